@@ -10,6 +10,7 @@ def extract_sequences_encoder_decoder_training(
     decoder_length: int,
     downsampling_ratio_encoder: int = 1,
     downsampling_ratio_decoder: int = 1,
+    dtype=np.float32,
 ):
     """Extract sequences from the dataframe for model input for training
 
@@ -21,19 +22,24 @@ def extract_sequences_encoder_decoder_training(
     :param decoder_length: length / number of time steps of the decoder
     :param downsampling_ratio_encoder: downsampling ratio to use for encoder data
     :param downsampling_ratio_decoder: downsampling ratio to use for decoder data
+    :param dtype: data type of the returned arrays
     :return: arrays of encoder input, decoder input, target values and target values
     of last encoder timestep
     """
-    inputs_encoder = df[:-decoder_length][input_features_encoder].values
-    inputs_decoder = df[encoder_length:][input_features_decoder].values
+    inputs_encoder = _to_feature_array(
+        df[:-decoder_length][input_features_encoder], dtype
+    )
+    inputs_decoder = _to_feature_array(
+        df[encoder_length:][input_features_decoder], dtype
+    )
 
-    y_shifted = df[(encoder_length - 1) : -1][target_feature].values
+    y_shifted = df[(encoder_length - 1) : -1][target_feature].to_numpy(dtype=dtype)
 
-    outputs_decoder = df[encoder_length:][target_feature].values
+    outputs_decoder = df[encoder_length:][target_feature].to_numpy(dtype=dtype)
 
     outputs_encoder_last = df[(encoder_length - 1) : -decoder_length][
         target_feature
-    ].values
+    ].to_numpy(dtype=dtype)
 
     X_encoder = _extract_windows(
         array=inputs_encoder,
@@ -73,6 +79,7 @@ def extract_sequences_encoder_decoder_inference(
     decoder_length: int,
     downsampling_ratio_encoder: int = 1,
     downsampling_ratio_decoder: int = 1,
+    dtype=np.float32,
 ):
     """Extract sequences from the dataframe for model input for inference
 
@@ -84,17 +91,22 @@ def extract_sequences_encoder_decoder_inference(
     :param decoder_length: length / number of time steps of the decoder
     :param downsampling_ratio_encoder: downsampling ratio to use for encoder data
     :param downsampling_ratio_decoder: downsampling ratio to use for decoder data
+    :param dtype: data type of the returned arrays
     :return: arrays of encoder input, decoder input, target values and target values
     of last encoder timestep
     """
-    inputs_encoder = df[:-decoder_length][input_features_encoder].values
-    inputs_decoder = df[encoder_length:][input_features_decoder].values
+    inputs_encoder = _to_feature_array(
+        df[:-decoder_length][input_features_encoder], dtype
+    )
+    inputs_decoder = _to_feature_array(
+        df[encoder_length:][input_features_decoder], dtype
+    )
 
-    y_shifted = df[(encoder_length - 1) : -1][target_feature].values
+    y_shifted = df[(encoder_length - 1) : -1][target_feature].to_numpy(dtype=dtype)
 
     outputs_encoder_last = df[(encoder_length - 1) : -decoder_length][
         target_feature
-    ].values
+    ].to_numpy(dtype=dtype)
 
     X_encoder = _extract_windows(
         array=inputs_encoder,
@@ -121,9 +133,24 @@ def extract_sequences_encoder_decoder_inference(
     return X_encoder, X_decoder, y_shifted, y_last
 
 
+def _to_feature_array(df, dtype):
+    """Convert the feature columns of a DataFrame to an array of shape (time,
+    features) in which the values of each feature are contiguous in memory
+
+    :param df: DataFrame with the feature columns
+    :param dtype: data type of the array
+    :return: Fortran-ordered array
+    """
+    return np.asfortranarray(df.to_numpy(dtype=dtype))
+
+
 def _extract_windows(array, seq_length, downsampling_ratio):
     """Transforms input array into sequences using the sliding window technique
 
+    The sequences are a read-only strided view on the input array that keeps the
+    memory layout of the input array, so no data is copied no matter how much the
+    windows overlap. Use np.array(...) on the result if a writable copy is needed.
+
     :param array: input array
     :param seq_length: the number of datapoints for each sequence
     :param downsampling_ratio: the ratio for which the sequences are downsampled.
@@ -136,9 +163,11 @@ def _extract_windows(array, seq_length, downsampling_ratio):
     ), "downsampling_ratio must be an integer greater than 0"
     len_array = array.shape[0]
     window_size_prime = 1 + (seq_length - 1) * downsampling_ratio
-    K_indices = np.arange(0, seq_length * downsampling_ratio, step=downsampling_ratio)
-    T_indices = np.arange(0, (len_array - window_size_prime + 1), step=1)
-    sub_windows = np.round(
-        np.expand_dims(K_indices, 0) + np.expand_dims(T_indices, 0).T
-    ).astype(int)
-    return array[sub_windows]
+    num_windows = max(len_array - window_size_prime + 1, 0)
+    return np.lib.stride_tricks.as_strided(
+        array,
+        shape=(num_windows, seq_length) + array.shape[1:],
+        strides=(array.strides[0], array.strides[0] * downsampling_ratio)
+        + array.strides[1:],
+        writeable=False,
+    )
@@ -35,10 +35,9 @@ class NaNHandler:
             df = df.copy()
         numerical_cols = df.select_dtypes(include=["number"]).columns.tolist()
 
-        # Interpolate
-        for col in numerical_cols:
-            df[col] = df[col].interpolate()
-            df[col] = df[col].fillna(method="backfill")
+        # Interpolate and fill leading NaNs backwards
+        if numerical_cols:
+            df[numerical_cols] = df[numerical_cols].interpolate().bfill()
         return df
 
 
@@ -80,6 +79,10 @@ class OneHotEncoder:
     ):
         if not inplace:
             df = df.copy()
+        encoded_cols = []
+        new_col_names = []
+        encodings = []
+        rows = np.arange(df.shape[0])
         for col_name, values in self.valid_values.items():
             # Do not transform columns that haven't been seen during fitting. If
             # drop_unseen, drop them.
@@ -90,18 +93,22 @@ class OneHotEncoder:
                 else:
                     continue
 
-            # Remove the values that have not been seen during fitting or had too few
-            # occurrences (Set to NaN)
-            df.loc[~df[col_name].isin(values), col_name] = np.nan
-            # Perform one-hot-encoding
-            for val in values:
-                new_col_name = self._gen_col_name(col_name, [val])[0]
-                rows_with_val = np.where(df[col_name] == val)[0]
-                df[new_col_name] = 0
-                df.loc[rows_with_val, new_col_name] = 1
-
-            # Remove original column
-            df.drop(col_name, axis=1, inplace=True)
+            # Look up the position of each value in the fitted values. Values that
+            # have not been seen during fitting or had too few occurrences get the
+            # code -1 and are encoded with all zeros.
+            codes = pd.Index(values).get_indexer(df[col_name])
+            encoding = np.zeros((df.shape[0], len(values)), dtype=np.int8)
+            seen = codes >= 0
+            encoding[rows[seen], codes[seen]] = 1
+
+            encoded_cols.append(col_name)
+            new_col_names += self._gen_col_name(col_name, values)
+            encodings.append(encoding)
+
+        # Remove the original columns and add the one-hot-encoded columns
+        df.drop(encoded_cols, axis=1, inplace=True)
+        if new_col_names:
+            df[new_col_names] = np.concatenate(encodings, axis=1)
         return df
 
     def _gen_col_name(self, col_name: str, values: List[str]) -> List[str]:
@@ -118,7 +125,48 @@ class OneHotEncoder:
         return new_col_names
 
 
-def compute_temporal_encoding(df, time_col: str, feature, mode):
+# Number of different encodings for each temporal encoding mode
+_NUM_TEMPORAL_ENCODINGS = {"seasons": 4, "months": 12, "hours": 24, "weekdays": 7}
+
+
+def wall_time_values(time_values):
+    """Convert time stamps to a datetime64[ns] array in local wall time
+
+    :param time_values: Series with the time stamps. Time zone aware time stamps
+    keep their local time instead of being converted to UTC
+    :return: datetime64[ns] array
+    """
+    time_values = pd.to_datetime(time_values)
+    if time_values.dt.tz is not None:
+        time_values = time_values.dt.tz_localize(None)
+    return time_values.to_numpy(dtype="datetime64[ns]")
+
+
+def _temporal_indices(time_values, mode):
+    """Computes the position of each time stamp in a temporal encoding
+
+    :param time_values: array of datetime64 values
+    :param mode: mode of the temporal encoding. See compute_temporal_encoding
+    :return: integer array with the position in the encoding for each time stamp.
+    -1 for missing time stamps (NaT)
+    """
+    time_values = np.asarray(time_values, dtype="datetime64[ns]")
+    if mode in ["seasons", "months"]:
+        indices = time_values.astype("datetime64[M]").astype(np.int64) % 12
+        if mode == "seasons":
+            indices //= 3
+    elif mode == "hours":
+        indices = time_values.astype("datetime64[h]").astype(np.int64) % 24
+    elif mode == "weekdays":
+        # 1970-01-01 was a Thursday, i.e. weekday 3
+        indices = (time_values.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    else:
+        raise ValueError("mode argument is wrong.")
+    indices[np.isnat(time_values)] = -1
+    return indices
+
+
+def compute_temporal_encoding(df, time_col: str, feature, mode, time_values=None):
     """Computes a temporal encoding
 
     Example: mode="months": the average value of the feature column is computed for
@@ -134,51 +182,32 @@ def compute_temporal_encoding(df, time_col: str, feature, mode):
     mode="months": 12 different encodings, one for each month
     mode="hours": 24 different encodings, one for each hour of the day.
     mode="weekdays": 7 different encodings, one for each day of the week.
+    :param time_values: time stamps of df as array of datetime64 values, e.g. from
+    wall_time_values. If None, they are read from the time_col column
     :return: list with the encoding
     """
-
-    if mode == "seasons":
-        winter = [1, 2, 3]
-        spring = [4, 5, 6]
-        summer = [7, 8, 9]
-        fall = [10, 11, 12]
-
-        mean_winter = df[pd.to_datetime(df[time_col]).dt.month.isin(winter)][
-            feature
-        ].mean()
-        mean_spring = df[pd.to_datetime(df[time_col]).dt.month.isin(spring)][
-            feature
-        ].mean()
-        mean_summer = df[pd.to_datetime(df[time_col]).dt.month.isin(summer)][
-            feature
-        ].mean()
-        mean_fall = df[pd.to_datetime(df[time_col]).dt.month.isin(fall)][feature].mean()
-
-        return [mean_winter, mean_spring, mean_summer, mean_fall]
-
-    elif mode == "months":
-        means = []
-        for i in range(0, 12):
-            means.append(
-                df[pd.to_datetime(df[time_col]).dt.month == i + 1][feature].mean()
-            )
-        return means
-    elif mode == "hours":
-        means = []
-        for i in range(0, 24):
-            means.append(df[pd.to_datetime(df[time_col]).dt.hour == i][feature].mean())
-        return means
-    elif mode == "weekdays":
-
-        means = []
-        for i in range(0, 7):
-            means.append(
-                df[pd.to_datetime(df[time_col]).dt.weekday == i][feature].mean()
-            )
-        return means
-
-    else:
-        raise ValueError("mode argument is wrong.")
+    if time_values is None:
+        time_values = wall_time_values(df[time_col])
+    indices = _temporal_indices(time_values, mode)
+    # Rows without time stamp are left out
+    has_time = indices >= 0
+    means = df[feature][has_time].groupby(indices[has_time]).mean()
+    return means.reindex(range(_NUM_TEMPORAL_ENCODINGS[mode])).tolist()
+
+
+def temporal_encoding_values(time_values, mode, encoding):
+    """Maps time stamps to the values of a temporal encoding
+
+    :param time_values: array of datetime64 values, e.g. from wall_time_values
+    :param mode: mode of the temporal encoding. See compute_temporal_encoding
+    :param encoding: list with the encoding, e.g. from compute_temporal_encoding
+    :return: array with the encoding value of each time stamp. NaN for missing time
+    stamps
+    """
+    indices = _temporal_indices(time_values, mode)
+    values = np.asarray(encoding, dtype=float)[indices]
+    values[indices < 0] = np.nan
+    return values
 
 
 def add_temporal_encoding(
@@ -212,84 +241,15 @@ def add_temporal_encoding(
     """
 
     df = df.copy(deep=True)
-    if mode == "seasons":
-        winter = [1, 2, 3]
-        spring = [4, 5, 6]
-        summer = [7, 8, 9]
-        fall = [10, 11, 12]
-        if encoding:
-            means = encoding
-        else:
-            train_len = int(df.shape[0] * train_size)
-            means = compute_temporal_encoding(
-                df[:train_len], time_col, feature, mode="seasons"
-            )
-
-        def season_mapper(row):
-            if pd.to_datetime(row[time_col]).month in winter:
-                return means[0]
-            elif pd.to_datetime(row[time_col]).month in spring:
-                return means[1]
-            elif pd.to_datetime(row[time_col]).month in summer:
-                return means[2]
-            elif pd.to_datetime(row[time_col]).month in fall:
-                return means[3]
-
-        df["temporal_encoding_seasons"] = df.apply(
-            lambda row: season_mapper(row), axis=1
-        )
-        return df, means
-
-    elif mode == "months":
-        if encoding:
-            means = encoding
-        else:
-            train_len = int(df.shape[0] * train_size)
-            means = compute_temporal_encoding(
-                df[:train_len], time_col, feature, mode="months"
-            )
-
-        def months_mapper(row):
-            return means[row[time_col].month - 1]
-
-        df["temporal_encoding_months"] = df.apply(
-            lambda row: months_mapper(row), axis=1
-        )
-        return df, means
-
-    elif mode == "weekdays":
-        if encoding:
-            means = encoding
-        else:
-            train_len = int(df.shape[0] * train_size)
-            means = compute_temporal_encoding(
-                df[:train_len], time_col, feature, mode="weekdays"
-            )
-
-        def weekdays_wrapper(row):
-            return means[row[time_col].weekday()]
-
-        df["temporal_encoding_weekdays"] = df.apply(
-            lambda row: weekdays_wrapper(row), axis=1
-        )
-        return df, means
-
-    elif mode == "hours":
-        if encoding:
-            means = encoding
-        else:
-            train_len = int(df.shape[0] * train_size)
-            means = compute_temporal_encoding(
-                df[:train_len], time_col, feature, mode="hours"
-            )
-
-        def hours_wrapper(row):
-            return means[row[time_col].hour]
-
-        df["temporal_encoding_hours"] = df.apply(lambda row: hours_wrapper(row), axis=1)
-        return df, means
+    if encoding:
+        means = encoding
     else:
-        raise ValueError("mode argument is wrong.")
+        train_len = int(df.shape[0] * train_size)
+        means = compute_temporal_encoding(df[:train_len], time_col, feature, mode=mode)
+
+    time_values = wall_time_values(df[time_col])
+    df["temporal_encoding_" + mode] = temporal_encoding_values(time_values, mode, means)
+    return df, means
 
 
 def fill_gaps(df, method="ffill"):
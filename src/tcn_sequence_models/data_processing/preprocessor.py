@@ -1,10 +1,11 @@
 import json
 import os
 import pickle
-import sys
 import tcn_sequence_models.utils.train_test_split
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from tcn_sequence_models import utils
+from tcn_sequence_models.data_processing import gen_sequences
+from tcn_sequence_models.data_processing import preprocessing
 from tcn_sequence_models.data_processing.preprocessing import NaNHandler
 from tcn_sequence_models.data_processing.preprocessing import OneHotEncoder
 from typing import List
@@ -13,14 +14,33 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 
-sys.path.insert(0, str(Path().cwd() / Path("../..")) + str(Path("/")))
-sys.path.insert(0, str(Path().cwd() / Path("../../..")) + str(Path("/")))
 
-from tcn_sequence_models.data_processing import gen_sequences, preprocessing
+def _excel_engine():
+    """Get the engine to read Excel files with.
+
+    :return: 'calamine' if python-calamine is installed and supported by pandas,
+    else None to let pandas choose the engine
+    """
+    pandas_version = tuple(int(v) for v in pd.__version__.split(".")[:2])
+    if pandas_version < (2, 2):
+        return None
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return None
+    return "calamine"
 
 
 class Preprocessor:
-    """Preprocessor class to prepare data for the models"""
+    """Preprocessor class to prepare data for the models
+
+    The sequences in the X and y attributes are float32 arrays. They are read-only
+    strided views on the processed data in which the values of each feature are
+    contiguous along the time axis. Slicing them, e.g. in train_test_split, does not
+    copy any data. Use np.ascontiguousarray to get a C-contiguous copy if needed.
+    The exception is the decoder input of a non-autoregressive TCN-TCN model without
+    decoder features, which is a new writable array of ones.
+    """
 
     def __init__(self, df: pd.DataFrame):
         self.df_raw = df
@@ -41,25 +61,31 @@ class Preprocessor:
         self.one_hot_encoder = None
         self.time_col = None
         self.min_rel_occurrence = None
+        self._time_ns = None
 
     def load_data(self, path, file_type="xlsx"):
-        """Load the raw data from a xlsx or csv file
+        """Load the raw data from a xlsx, parquet or csv file
 
         The data will be loaded into the df_raw DataFrame attribute
 
-        Note: Currently, only works with xlsx files because of issues with the
-        date-time data when using csv files.
+        Note: Currently, only works with xlsx and parquet files because of issues
+        with the date-time data when using csv files. xlsx files are read with the
+        faster calamine engine if python-calamine is installed.
 
         :param path: the path to the data file
-        :param file_type: the type of the file. Currently only 'xlsx' is supported
+        :param file_type: the type of the file. One of ['xlsx', 'parquet']
         :return:
         """
         if file_type == "xlsx":
-            self.df_raw = pd.read_excel(path)
+            self.df_raw = pd.read_excel(path, engine=_excel_engine())
+        elif file_type == "parquet":
+            self.df_raw = pd.read_parquet(path)
         elif file_type == "csv":
-            raise NotImplementedError("Currently only xlsx files are supported")
+            raise NotImplementedError(
+                "Currently only xlsx and parquet files are supported"
+            )
         else:
-            raise ValueError("Currently only xlsx files are supported")
+            raise ValueError("Currently only xlsx and parquet files are supported")
 
     def process(
         self,
@@ -95,6 +121,8 @@ class Preprocessor:
         :param input_seq_len: input (encoder) sequence length
         :param output_seq_len: output (decoder and target) sequence length
         :param model_type: One of ['tcn_tcn', 'tcn_gru']
+        :param time_col: label of the time column. Needed when using split_date or
+        temporal encodings
         :param split_ratio: the ratio with which to split into train and test set
         :param split_date: the date with which to split into train and test set
         :param temporal_encoding_modes: list of the temporal encodings to apply.
@@ -110,6 +138,9 @@ class Preprocessor:
         assert split_ratio is not None or split_date is not None, (
             "split_ratio or " "split_date must be " "not None "
         )
+        assert (
+            split_date is None or time_col is not None
+        ), "time_col must be given when splitting with split_date"
 
         if model_type not in ["tcn_tcn", "tcn_gru"]:
             raise ValueError(
@@ -127,11 +158,26 @@ class Preprocessor:
         self.model_type = model_type
         self.min_rel_occurrence = min_rel_occurrence
 
+        # Time stamps as datetime64[ns] array in local wall time for the split_date
+        # lookup and the temporal encodings
+        self._time_ns = None
+        if split_date is not None or temporal_encoding_modes:
+            self._time_ns = preprocessing.wall_time_values(
+                self.df_processed[self.time_col]
+            )
+
         # compute split ratio if from split_date
         if split_date is not None:
-            i_split = self.df_processed[
-                self.df_processed["date / time"].dt.date < split_date
-            ].index[-1]
+            split_time = np.datetime64(split_date, "ns")
+            # Wall time can go backwards at DST changes, so check the cached array
+            if pd.Index(self._time_ns).is_monotonic_increasing:
+                # Last index before split_date by binary search
+                i_split = np.searchsorted(self._time_ns, split_time, side="left") - 1
+            else:
+                before_split = np.flatnonzero(self._time_ns < split_time)
+                i_split = before_split[-1] if before_split.size else -1
+            if i_split < 0:
+                raise ValueError("No time stamps before split_date")
             split_ratio = i_split / self.df_processed.shape[0]
 
         # NaN handling
@@ -153,24 +199,28 @@ class Preprocessor:
         )
 
         # Add temporal encoding
-        if temporal_encoding_modes is None:
-            temporal_encoding_modes = []
-        for temp_enc in temporal_encoding_modes:
-            self.df_processed, temporal_encoding = preprocessing.add_temporal_encoding(
-                self.df_processed,
-                self.time_col,
-                split_ratio,
-                feature=feature_target,
-                mode=temp_enc,
-            )
-            encoded_features_input_encoder = encoded_features_input_encoder + [
-                "temporal_encoding_" + temp_enc
-            ]
-            encoded_features_input_decoder = encoded_features_input_decoder + [
-                "temporal_encoding_" + temp_enc
-            ]
-
-            self.temporal_encodings.append((temp_enc, temporal_encoding))
+        self.temporal_encodings = []
+        if temporal_encoding_modes:
+            train_len = int(self.df_processed.shape[0] * split_ratio)
+            df_train = self.df_processed[:train_len]
+            # The encodings are independent of each other, so compute them in parallel
+            with ThreadPoolExecutor(len(temporal_encoding_modes)) as executor:
+                encodings = executor.map(
+                    lambda temp_enc: preprocessing.compute_temporal_encoding(
+                        df_train,
+                        self.time_col,
+                        feature_target,
+                        mode=temp_enc,
+                        time_values=self._time_ns[:train_len],
+                    ),
+                    temporal_encoding_modes,
+                )
+                self.temporal_encodings = list(zip(temporal_encoding_modes, encodings))
+        temporal_features = self._add_temporal_encodings(
+            self.temporal_encodings, self._time_ns
+        )
+        encoded_features_input_encoder += temporal_features
+        encoded_features_input_decoder += temporal_features
 
         # scale X-features
         self.df_processed, self.scaler_X = utils.scaling.scale_input_data(
@@ -179,15 +229,16 @@ class Preprocessor:
             encoded_features_input_decoder,
             feature_target,
             train_ratio=split_ratio,
+            inplace=True,
         )
 
         # scale target
         self.df_processed, self.scaler_y = utils.scaling.scale_target_data(
-            self.df_processed, [feature_target], train_ratio=split_ratio
+            self.df_processed, [feature_target], train_ratio=split_ratio, inplace=True
         )
 
         # Reset index
-        self.df_processed = self.df_processed.reset_index(drop=True)
+        self.df_processed.reset_index(drop=True, inplace=True)
 
         # Create sequences
         (
@@ -206,22 +257,63 @@ class Preprocessor:
             downsampling_ratio_encoder=1,
             downsampling_ratio_decoder=1,
         )
-        if self.model_type == "tcn_tcn":
-            if self.autoregressive:
-                self.X = [X_encoder, X_decoder, y_shifted, y_last]
-            else:
-                if X_decoder.shape[-1] == 0:
-                    X_decoder = np.full(
-                        shape=(X_decoder.shape[0], X_decoder.shape[1], 1),
-                        fill_value=1,
-                        dtype=float,
-                    )
-                self.X = [X_encoder, X_decoder]
-        else:
-            self.X = [X_encoder, X_decoder, y_last]
-
+        self.X = self._assemble_X(X_encoder, X_decoder, y_last, y_shifted)
         self.y = y
 
+    def _assemble_X(self, X_encoder, X_decoder, y_last, y_shifted=None):
+        """Combine the sequences to the list of inputs of the model type.
+
+        :param X_encoder: encoder input sequences
+        :param X_decoder: decoder input sequences
+        :param y_last: target values of the last encoder time step
+        :param y_shifted: target sequences shifted by one time step. Only used by
+        the autoregressive TCN-TCN model during training (teacher forcing)
+        :return: List with the model inputs
+        """
+        if self.model_type != "tcn_tcn":
+            return [X_encoder, X_decoder, y_last]
+        if self.autoregressive:
+            if y_shifted is None:
+                return [X_encoder, X_decoder, y_last]
+            return [X_encoder, X_decoder, y_shifted, y_last]
+        if X_decoder.shape[-1] == 0:
+            # The decoder needs an input, so a dummy feature with all 1s is used
+            X_decoder = np.full(
+                shape=(X_decoder.shape[0], X_decoder.shape[1], 1),
+                fill_value=1,
+                dtype=X_decoder.dtype,
+            )
+        return [X_encoder, X_decoder]
+
+    def _add_temporal_encodings(
+        self, temporal_encodings, time_values=None
+    ) -> List[str]:
+        """Add a column for each temporal encoding to df_processed.
+
+        :param temporal_encodings: list of tuples with the mode and the encoding
+        :param time_values: time stamps of df_processed as array of datetime64 values.
+        If None, they are read from the time column
+        :return: List with the names of the new columns
+        """
+        new_feature_names = [
+            "temporal_encoding_" + mode for mode, _ in temporal_encodings
+        ]
+        if not new_feature_names:
+            return new_feature_names
+
+        if time_values is None:
+            time_values = preprocessing.wall_time_values(
+                self.df_processed[self.time_col]
+            )
+        encoded = np.column_stack(
+            [
+                preprocessing.temporal_encoding_values(time_values, mode, encoding)
+                for mode, encoding in temporal_encodings
+            ]
+        )
+        self.df_processed[new_feature_names] = encoded
+        return new_feature_names
+
     def _create_encoded_feature_lists(
         self, feature_names: List[str], ohe: OneHotEncoder
     ) -> List[str]:
@@ -277,15 +369,9 @@ class Preprocessor:
         )
 
         # Add temporal encoding
-        for temp_enc in self.temporal_encodings:
-            self.df_processed, temporal_encoding = preprocessing.add_temporal_encoding(
-                self.df_processed,
-                time_col=self.time_col,
-                mode=temp_enc[0],
-                encoding=temp_enc[1],
-            )
-            encoded_features_input_encoder.append("temporal_encoding_" + temp_enc[0])
-            encoded_features_input_decoder.append("temporal_encoding_" + temp_enc[0])
+        temporal_features = self._add_temporal_encodings(self.temporal_encodings)
+        encoded_features_input_encoder += temporal_features
+        encoded_features_input_decoder += temporal_features
 
         # scale X-features
         self.df_processed, _ = utils.scaling.scale_input_data(
@@ -294,6 +380,7 @@ class Preprocessor:
             encoded_features_input_decoder,
             self.feature_target,
             scaler=self.scaler_X,
+            inplace=True,
         )
 
         # scale target
@@ -301,10 +388,11 @@ class Preprocessor:
             self.df_processed,
             [self.feature_target],
             scaler=self.scaler_y,
+            inplace=True,
         )
 
         # Reset index
-        self.df_processed = self.df_processed.reset_index(drop=True)
+        self.df_processed.reset_index(drop=True, inplace=True)
 
         (
             X_encoder,
@@ -322,13 +410,7 @@ class Preprocessor:
             downsampling_ratio_decoder=1,
         )
 
-        if self.model_type == "tcn_tcn":
-            if self.autoregressive:
-                self.X = [X_encoder, X_decoder, y_last]
-            else:
-                self.X = [X_encoder, X_decoder]
-        else:
-            self.X = [X_encoder, X_decoder, y_last]
+        self.X = self._assemble_X(X_encoder, X_decoder, y_last)
 
     def process_from_config_training(
         self,
@@ -365,15 +447,9 @@ class Preprocessor:
         )
 
         # Add temporal encoding
-        for temp_enc in self.temporal_encodings:
-            self.df_processed, temporal_encoding = preprocessing.add_temporal_encoding(
-                self.df_processed,
-                time_col=self.time_col,
-                mode=temp_enc[0],
-                encoding=temp_enc[1],
-            )
-            encoded_features_input_encoder.append("temporal_encoding_" + temp_enc[0])
-            encoded_features_input_decoder.append("temporal_encoding_" + temp_enc[0])
+        temporal_features = self._add_temporal_encodings(self.temporal_encodings)
+        encoded_features_input_encoder += temporal_features
+        encoded_features_input_decoder += temporal_features
 
         # scale X-features
         self.df_processed, _ = utils.scaling.scale_input_data(
@@ -382,6 +458,7 @@ class Preprocessor:
             encoded_features_input_decoder,
             self.feature_target,
             scaler=self.scaler_X,
+            inplace=True,
         )
 
         # scale target
@@ -389,10 +466,11 @@ class Preprocessor:
             self.df_processed,
             [self.feature_target],
             scaler=self.scaler_y,
+            inplace=True,
         )
 
         # Reset index
-        self.df_processed = self.df_processed.reset_index(drop=True)
+        self.df_processed.reset_index(drop=True, inplace=True)
 
         (
             X_encoder,
@@ -411,13 +489,7 @@ class Preprocessor:
             downsampling_ratio_decoder=1,
         )
 
-        if self.model_type == "tcn_tcn":
-            if self.autoregressive:
-                self.X = [X_encoder, X_decoder, y_shifted, y_last]
-            else:
-                self.X = [X_encoder, X_decoder]
-        else:
-            self.X = [X_encoder, X_decoder, y_last]
+        self.X = self._assemble_X(X_encoder, X_decoder, y_last, y_shifted)
         self.y = y
 
     def save_preprocessor_config(self, save_path):
@@ -439,27 +511,24 @@ class Preprocessor:
         config_dict["output_seq_len"] = self.output_seq_len
         config_dict["model_type"] = self.model_type
         config_dict["time_col"] = self.time_col
+        config_dict["nan_handler"] = {"median_vals": self.nan_handler.median_vals}
+        config_dict["one_hot_encoder"] = {
+            "min_rel_occurrence": self.one_hot_encoder.min_rel_occurrence,
+            "valid_values": {
+                col: list(values)
+                for col, values in self.one_hot_encoder.valid_values.items()
+            },
+            "new_col_names": self.one_hot_encoder.new_col_names,
+        }
 
         json.dump(config_dict, open(config_file_dir, "w"))
 
-        # Save NaNHandler
-        nan_handler_dir = os.path.join(save_path, "NaNHandler.pkl")
-        with open(nan_handler_dir, "wb") as f:
-            pickle.dump(self.nan_handler, f, pickle.HIGHEST_PROTOCOL)
-
-        # Save OneHotEncoder
-        ohe_dir = os.path.join(save_path, "OneHotEncoder.pkl")
-        with open(ohe_dir, "wb") as f:
-            pickle.dump(self.one_hot_encoder, f, pickle.HIGHEST_PROTOCOL)
-
-        # Save scalers
-        scaler_X_dir = os.path.join(save_path, "scaler_X.pkl")
-        with open(scaler_X_dir, "wb") as f:
-            pickle.dump(self.scaler_X, f, pickle.HIGHEST_PROTOCOL)
-
-        scaler_y_dir = os.path.join(save_path, "scaler_y.pkl")
-        with open(scaler_y_dir, "wb") as f:
-            pickle.dump(self.scaler_y, f, pickle.HIGHEST_PROTOCOL)
+        # Save the fitted scaler attributes of both scalers in one file
+        scaler_arrays = {}
+        for name, scaler in [("scaler_X", self.scaler_X), ("scaler_y", self.scaler_y)]:
+            for attr, value in utils.scaling.scaler_to_arrays(scaler).items():
+                scaler_arrays[name + "." + attr] = value
+        np.savez(os.path.join(save_path, "scalers.npz"), **scaler_arrays)
 
     def load_preprocessor_config(self, load_path):
         """Load a saved Preprocessor configuration
@@ -482,6 +551,35 @@ class Preprocessor:
         self.model_type = config_dict["model_type"]
         self.time_col = config_dict["time_col"]
 
+        scalers_dir = os.path.join(load_path, "scalers.npz")
+        if not os.path.exists(scalers_dir):
+            # Configuration saved by an older version
+            self._load_pickled_config(load_path)
+            return
+
+        self.nan_handler = NaNHandler()
+        self.nan_handler.median_vals = config_dict["nan_handler"]["median_vals"]
+
+        ohe_config = config_dict["one_hot_encoder"]
+        self.one_hot_encoder = OneHotEncoder(ohe_config["min_rel_occurrence"])
+        self.one_hot_encoder.valid_values = ohe_config["valid_values"]
+        self.one_hot_encoder.new_col_names = ohe_config["new_col_names"]
+
+        scaler_arrays = {"scaler_X": {}, "scaler_y": {}}
+        with np.load(scalers_dir) as arrays:
+            for key in arrays.files:
+                name, attr = key.split(".", 1)
+                scaler_arrays[name][attr] = arrays[key]
+        self.scaler_X = utils.scaling.scaler_from_arrays(scaler_arrays["scaler_X"])
+        self.scaler_y = utils.scaling.scaler_from_arrays(scaler_arrays["scaler_y"])
+
+    def _load_pickled_config(self, load_path):
+        """Load NaNHandler, OneHotEncoder and scalers of a configuration that was
+        saved as pickle files
+
+        :param load_path: the directory from where to load the configuration
+        :return:
+        """
         nan_handler_dir = os.path.join(load_path, "NaNHandler.pkl")
         with open(nan_handler_dir, "rb") as f:
             self.nan_handler = pickle.load(f)
@@ -515,4 +613,59 @@ class Preprocessor:
             X_train = X_train[:3]
             X_val = X_val[:2] + [X_val[3]]
 
+        assert all(
+            x.dtype == np.float32 for x in X_train + X_val + [y_train, y_val]
+        ), "sequences must be float32"
         return X_train, y_train, X_val, y_val
+
+    def as_tf_dataset(self, batch_size: int = 64, X=None, y=None, shuffle=False):
+        """Create a tf.data.Dataset that yields batches of sequences.
+
+        The sequences in X and y are strided views on the processed data, so only
+        the sequences of the current batch are materialized. Use this instead of
+        passing X and y to a model directly when all sequences do not fit into
+        memory at once.
+
+        :param batch_size: number of sequences per batch
+        :param X: list of input sequences, e.g. from train_test_split. If None,
+        the model inputs for training from the X attribute and the y attribute
+        are used.
+        :param y: target sequences. If None, the dataset only yields the inputs.
+        :param shuffle: if True, the order of the sequences is shuffled in every
+        epoch
+        :return: tf.data.Dataset that yields (X, y) batches or only X batches
+        """
+        import tensorflow as tf
+
+        if X is None:
+            X, y = self.X, self.y
+            if self.model_type == "tcn_tcn" and self.autoregressive and len(X) == 4:
+                # y_last is only used for validation / inference
+                X = X[:3]
+        num_sequences = X[0].shape[0]
+
+        def generate_batches():
+            if shuffle:
+                order = np.random.permutation(num_sequences)
+            else:
+                order = np.arange(num_sequences)
+            for start in range(0, num_sequences, batch_size):
+                batch_indices = order[start : start + batch_size]
+                batch_X = tuple(x[batch_indices] for x in X)
+                if y is None:
+                    yield batch_X
+                else:
+                    yield batch_X, y[batch_indices]
+
+        signature = tuple(
+            tf.TensorSpec(shape=(None,) + x.shape[1:], dtype=x.dtype) for x in X
+        )
+        if y is not None:
+            signature = (
+                signature,
+                tf.TensorSpec(shape=(None,) + y.shape[1:], dtype=y.dtype),
+            )
+        dataset = tf.data.Dataset.from_generator(
+            generate_batches, output_signature=signature
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
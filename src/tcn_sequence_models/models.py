@@ -10,6 +10,7 @@ from typing import List
 from typing import Optional
 
 import numpy as np
+import tensorflow as tf
 from keras_tuner import BayesianOptimization
 from sklearn import metrics
 from tensorflow.keras.callbacks import EarlyStopping
@@ -39,15 +40,20 @@ class BaseModel(ABC):
     ):
         """Fitting function. Same as for TensorFlow model class
 
-        :param X_train: input training data
-        :param y_train: target training data
-        :param validation_data: tuple with the validation data (X_val, y_val)
+        :param X_train: input training data or a tf.data.Dataset yielding (X, y)
+        batches, e.g. from Preprocessor.as_tf_dataset. A dataset is not shuffled by
+        Keras, use as_tf_dataset(shuffle=True) instead.
+        :param y_train: target training data. None if X_train is a dataset
+        :param validation_data: tuple with the validation data (X_val, y_val) or a
+        tf.data.Dataset
         :param epochs: number of epochs
-        :param batch_size: batch size
+        :param batch_size: batch size. Ignored if X_train is a dataset
         :param callbacks: callbacks
         :param kwargs: additional parameters
         :return:
         """
+        if isinstance(X_train, tf.data.Dataset):
+            batch_size = None
         self.model.fit(
             X_train,
             y_train,
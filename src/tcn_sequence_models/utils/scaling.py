@@ -2,7 +2,7 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler
 
 
-def scale(df, columns, train_ratio=1.0, scaler=None):
+def scale(df, columns, train_ratio=1.0, scaler=None, inplace=False):
     """scale the value in a DataFrame
 
     :param df: the DataFrame
@@ -10,21 +10,23 @@ def scale(df, columns, train_ratio=1.0, scaler=None):
     :param train_ratio: the ratio of the training data that is used to fit the
     scaler. Leave as 1 if the whole data shall be used to scale
     :param scaler: an already fitted scaler
+    :param inplace: if True, the columns of df are scaled in place instead of in a
+    copy of df
     :return: the DataFrame with scaled values
     :rtype pandas DataFrame and the scaler
     """
-    df = df.copy(deep=True)
-    df_train = df[: int(df.shape[0] * train_ratio)]
-    if len(columns) == 1:
-        if scaler is None:
-            scaler = StandardScaler()
-            scaler.fit(df_train[columns].values.reshape(-1, 1))
-        df[columns] = scaler.transform(df[columns].values.reshape(-1, 1))
-    else:
-        if scaler is None:
-            scaler = StandardScaler()
-            scaler.fit(df_train[columns])
-        df[columns] = scaler.transform(df[columns])
+    if not inplace:
+        df = df.copy(deep=True)
+    values = df[columns].to_numpy(dtype=np.float64, copy=True)
+    if scaler is None:
+        scaler = StandardScaler()
+        df_train = df[columns][: int(df.shape[0] * train_ratio)]
+        # Fit on the DataFrame to keep the feature names, except for single columns
+        scaler.fit(df_train.values if len(columns) == 1 else df_train)
+    # Same as scaler.transform, computed in values
+    np.subtract(values, scaler.mean_, out=values)
+    np.divide(values, scaler.scale_, out=values)
+    df[columns] = values
 
     return df, scaler
 
@@ -32,15 +34,58 @@ def scale(df, columns, train_ratio=1.0, scaler=None):
 def inverse_scale_sequences(sequences, scaler):
     """inverse scale sequences of data
 
-    :param sequences: input sequences
+    :param sequences: input sequences with shape (num_sequences, seq_len,
+    num_features). For a scaler fitted on a single feature, the shape
+    (num_sequences, seq_len) is also accepted, e.g. for the target sequences y
     :param scaler: fitted scaler
-    :return: array of the inverse scaled sequences
+    :return: array of the inverse scaled sequences with the shape of sequences
     :rtype: numpy array
     """
-    unscaled_sequences = []
-    for sequence in sequences:
-        unscaled_sequences.append(scaler.inverse_transform(sequence))
-    return np.array(unscaled_sequences)
+    sequences = np.asarray(sequences)
+    num_features = scaler.n_features_in_
+    if not (sequences.ndim == 2 and num_features == 1) and (
+        sequences.ndim != 3 or sequences.shape[-1] != num_features
+    ):
+        raise ValueError(
+            f"sequences with shape {sequences.shape} do not match a scaler with "
+            f"{num_features} features"
+        )
+    # Inverse scale the time steps of all sequences as rows of one 2D array
+    unscaled = scaler.inverse_transform(sequences.reshape(-1, num_features))
+    return unscaled.reshape(sequences.shape)
+
+
+def scaler_to_arrays(scaler):
+    """Get the fitted attributes of a StandardScaler as arrays, e.g. to save them
+    with np.savez
+
+    :param scaler: fitted StandardScaler
+    :return: dict with the attribute names and arrays
+    """
+    arrays = {
+        attr: np.asarray(getattr(scaler, attr))
+        for attr in ["mean_", "scale_", "var_", "n_samples_seen_"]
+    }
+    if hasattr(scaler, "feature_names_in_"):
+        arrays["feature_names_in_"] = scaler.feature_names_in_.astype(str)
+    return arrays
+
+
+def scaler_from_arrays(arrays):
+    """Create a fitted StandardScaler from the arrays of scaler_to_arrays
+
+    :param arrays: dict with the attribute names and arrays
+    :return: the fitted StandardScaler
+    """
+    scaler = StandardScaler()
+    for attr, value in arrays.items():
+        if attr == "feature_names_in_":
+            value = value.astype(object)
+        elif value.ndim == 0:
+            value = value.item()
+        setattr(scaler, attr, value)
+    scaler.n_features_in_ = scaler.mean_.shape[0]
+    return scaler
 
 
 def scale_input_data(
@@ -50,6 +95,7 @@ def scale_input_data(
     feature_target,
     train_ratio=1.0,
     scaler=None,
+    inplace=False,
 ):
     """Scales the input data of encoder and decoder
 
@@ -59,9 +105,9 @@ def scale_input_data(
     :param feature_target: label of the target feature
     :param train_ratio: ratio of training data
     :param scaler: optionally a fitted scaler
+    :param inplace: if True, df is scaled in place
     :return: DataFrame with scaled data and the fitted scaler
     """
-    df = df.copy(deep=True)
     features_input_without_target = list(
         np.unique(features_input_encoder + features_input_decoder)
     )
@@ -71,22 +117,26 @@ def scale_input_data(
         features_input_without_target.remove(feature_target)
 
     df_scaled, scaler = scale(
-        df, features_input_without_target, train_ratio=train_ratio, scaler=scaler
+        df,
+        features_input_without_target,
+        train_ratio=train_ratio,
+        scaler=scaler,
+        inplace=inplace,
     )
     return df_scaled, scaler
 
 
-def scale_target_data(df, feature_target, train_ratio=1.0, scaler=None):
+def scale_target_data(df, feature_target, train_ratio=1.0, scaler=None, inplace=False):
     """Scales the target data
 
     :param df: DataFrame
     :param feature_target: label of the target feature
     :param train_ratio: ratio of training data
     :param scaler: optionally a fitted scaler
+    :param inplace: if True, df is scaled in place
     :return: DataFrame with scaled data and the fitted scaler
     """
-    df = df.copy(deep=True)
     df_scaled, scaler = scale(
-        df, feature_target, train_ratio=train_ratio, scaler=scaler
+        df, feature_target, train_ratio=train_ratio, scaler=scaler, inplace=inplace
     )
     return df_scaled, scaler
@@ -1 +1,73 @@
+import numpy as np
+import pandas as pd
 import pytest
+from tcn_sequence_models.data_processing import gen_sequences
+
+
+def _naive_windows(array, seq_length, downsampling_ratio):
+    window_size = 1 + (seq_length - 1) * downsampling_ratio
+    return np.array(
+        [
+            array[i : i + window_size : downsampling_ratio]
+            for i in range(array.shape[0] - window_size + 1)
+        ]
+    )
+
+
+@pytest.mark.parametrize("seq_length", [1, 3, 5])
+@pytest.mark.parametrize("downsampling_ratio", [1, 2])
+def test_extract_windows(seq_length, downsampling_ratio):
+    array = np.arange(40, dtype=float).reshape(20, 2)
+    windows = gen_sequences._extract_windows(array, seq_length, downsampling_ratio)
+    np.testing.assert_array_equal(
+        windows, _naive_windows(array, seq_length, downsampling_ratio)
+    )
+    assert not windows.flags.writeable
+
+
+def test_extract_windows_1d():
+    array = np.arange(10, dtype=float)
+    windows = gen_sequences._extract_windows(array, 4, 1)
+    assert windows.shape == (7, 4)
+    np.testing.assert_array_equal(windows, _naive_windows(array, 4, 1))
+
+
+def test_extract_windows_too_short():
+    windows = gen_sequences._extract_windows(np.zeros((3, 2)), 5, 1)
+    assert windows.shape == (0, 5, 2)
+
+
+def test_extract_sequences_encoder_decoder_training():
+    df = pd.DataFrame(
+        {"a": np.arange(12, dtype=float), "b": np.arange(12, dtype=float) * 10}
+    )
+    X_encoder, X_decoder, y, y_shifted, y_last = (
+        gen_sequences.extract_sequences_encoder_decoder_training(
+            df, ["a", "b"], ["b"], "a", encoder_length=4, decoder_length=3
+        )
+    )
+    assert X_encoder.shape == (6, 4, 2)
+    assert X_decoder.shape == (6, 3, 1)
+    assert y.shape == (6, 3)
+    assert y_shifted.shape == (6, 3)
+    assert y_last.shape == (6, 1)
+    np.testing.assert_array_equal(X_encoder[2, :, 0], [2, 3, 4, 5])
+    np.testing.assert_array_equal(X_decoder[2, :, 0], [60, 70, 80])
+    np.testing.assert_array_equal(y[2], [6, 7, 8])
+    np.testing.assert_array_equal(y_shifted[2], [5, 6, 7])
+    np.testing.assert_array_equal(y_last[2], [5])
+
+
+def test_extract_sequences_dtype_and_layout():
+    df = pd.DataFrame(
+        {"a": np.arange(12, dtype=float), "b": np.arange(12, dtype=float) * 10}
+    )
+    X_encoder, X_decoder, y, y_shifted, y_last = (
+        gen_sequences.extract_sequences_encoder_decoder_training(
+            df, ["a", "b"], ["b"], "a", encoder_length=4, decoder_length=3
+        )
+    )
+    for array in [X_encoder, X_decoder, y, y_shifted, y_last]:
+        assert array.dtype == np.float32
+    # Values of a feature are contiguous along the time axis
+    assert X_encoder.strides[1] == X_encoder.itemsize
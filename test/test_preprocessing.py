@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+from tcn_sequence_models.data_processing import preprocessing
+from tcn_sequence_models.data_processing.preprocessing import NaNHandler
+from tcn_sequence_models.data_processing.preprocessing import OneHotEncoder
+from tcn_sequence_models.utils import scaling
+
+
+def _expected_encoding(df, mode, num_values):
+    time = df["time"].dt
+    keys = {
+        "months": time.month - 1,
+        "seasons": (time.month - 1) // 3,
+        "hours": time.hour,
+        "weekdays": time.weekday,
+    }[mode]
+    return [df["y"][keys == i].mean() for i in range(num_values)]
+
+
+@pytest.mark.parametrize(
+    "mode, num_values", [("months", 12), ("seasons", 4), ("hours", 24), ("weekdays", 7)]
+)
+@pytest.mark.parametrize("tz", [None, "Europe/Berlin"])
+def test_compute_temporal_encoding(mode, num_values, tz):
+    time = pd.Series(pd.date_range("2019-12-30", periods=2000, freq="5h", tz=tz))
+    df = pd.DataFrame({"time": time, "y": np.arange(2000, dtype=float)})
+    encoding = preprocessing.compute_temporal_encoding(df, "time", "y", mode)
+    np.testing.assert_allclose(encoding, _expected_encoding(df, mode, num_values))
+
+
+@pytest.mark.parametrize("mode", ["months", "seasons", "hours", "weekdays"])
+def test_compute_temporal_encoding_skips_missing_time(mode):
+    df = pd.DataFrame(
+        {
+            "time": pd.to_datetime(["2020-01-06 10:00", None, "2020-01-07 11:00"]),
+            "y": [1.0, 1000.0, 3.0],
+        }
+    )
+    encoding = preprocessing.compute_temporal_encoding(df, "time", "y", mode)
+    assert np.nanmax(encoding) <= 3.0
+
+
+def test_add_temporal_encoding_missing_time():
+    df = pd.DataFrame(
+        {"time": pd.to_datetime(["2020-01-06 10:00", None]), "y": [1.0, 2.0]}
+    )
+    df, _ = preprocessing.add_temporal_encoding(
+        df, "time", mode="hours", encoding=list(range(24))
+    )
+    assert df["temporal_encoding_hours"][0] == 10
+    assert np.isnan(df["temporal_encoding_hours"][1])
+
+
+def test_add_temporal_encoding_time_zone():
+    time = pd.Series(
+        pd.date_range("2020-06-01 00:00", periods=3, freq="h", tz="Europe/Berlin")
+    )
+    df = pd.DataFrame({"time": time, "y": [1.0, 2.0, 3.0]})
+    df, _ = preprocessing.add_temporal_encoding(
+        df, "time", mode="hours", encoding=list(range(24))
+    )
+    # Local wall time, not UTC
+    np.testing.assert_array_equal(df["temporal_encoding_hours"], [0, 1, 2])
+
+
+def _create_categorical_df():
+    return pd.DataFrame(
+        {
+            "c1": ["a", "b", "a", "c"],
+            "x": [1.0, 2.0, 3.0, 4.0],
+            "c2": ["u", "v", "v", "v"],
+        }
+    )
+
+
+def test_one_hot_encoder_transform():
+    encoder = OneHotEncoder()
+    encoder.fit(_create_categorical_df())
+    df = encoder.transform(_create_categorical_df())
+    # Encoded columns are appended in the order of the columns and their values
+    assert df.columns.tolist() == ["x", "c1=a", "c1=b", "c1=c", "c2=u", "c2=v"]
+    np.testing.assert_array_equal(
+        df.to_numpy(),
+        [
+            [1, 1, 0, 0, 1, 0],
+            [2, 0, 1, 0, 0, 1],
+            [3, 1, 0, 0, 0, 1],
+            [4, 0, 0, 1, 0, 1],
+        ],
+    )
+
+
+def test_one_hot_encoder_transform_unseen_values():
+    encoder = OneHotEncoder(min_rel_occurrence=0.3)
+    encoder.fit(_create_categorical_df())
+    df = pd.DataFrame({"c1": ["a", "c", None, "d"], "x": 1.0, "c2": "v"})
+    df = encoder.transform(df)
+    assert df.columns.tolist() == ["x", "c1=a", "c2=v"]
+    # Rare, missing and unseen values are encoded with all zeros
+    np.testing.assert_array_equal(df["c1=a"], [1, 0, 0, 0])
+    np.testing.assert_array_equal(df["c2=v"], [1, 1, 1, 1])
+
+
+@pytest.mark.parametrize("inplace", [True, False])
+def test_one_hot_encoder_transform_inplace(inplace):
+    encoder = OneHotEncoder()
+    encoder.fit(_create_categorical_df())
+    df = _create_categorical_df()
+    df_transformed = encoder.transform(df, inplace=inplace)
+    if inplace:
+        assert df_transformed is df
+    assert ("c1=a" in df.columns) == inplace
+    assert ("c1" in df.columns) != inplace
+
+
+def _create_nan_df():
+    return pd.DataFrame(
+        {
+            "x": [np.nan, 1.0, np.nan, 3.0, np.nan],
+            "n": [np.nan, np.nan, 2, 2, 5],
+            "c": ["a", None, "b", None, "c"],
+        }
+    )
+
+
+@pytest.mark.parametrize("inplace", [True, False])
+def test_nan_handler_transform(inplace):
+    nan_handler = NaNHandler()
+    nan_handler.fit(_create_nan_df())
+    df = _create_nan_df()
+    df_transformed = nan_handler.transform(df, inplace=inplace)
+    # Linear interpolation, leading NaNs are filled backwards and trailing NaNs
+    # with the last value
+    np.testing.assert_array_equal(df_transformed["x"], [1.0, 1.0, 2.0, 3.0, 3.0])
+    np.testing.assert_array_equal(df_transformed["n"], [2.0, 2.0, 2.0, 2.0, 5.0])
+    # Categorical columns are not changed
+    pd.testing.assert_series_equal(df_transformed["c"], _create_nan_df()["c"])
+    if inplace:
+        assert df_transformed is df
+    else:
+        assert df["x"].isna().sum() == 3
+
+
+def _create_numerical_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "x1": rng.random(20) * 10,
+            "x2": np.full(20, 3.0),
+            "x3": np.arange(20),
+            "c": "a",
+        }
+    )
+
+
+@pytest.mark.parametrize("columns", [["x1", "x2", "x3"], ["x2"], ["x3"]])
+@pytest.mark.parametrize("train_ratio", [1.0, 0.5])
+def test_scale(columns, train_ratio):
+    df = _create_numerical_df()
+    df_scaled, scaler = scaling.scale(df, columns, train_ratio=train_ratio)
+
+    expected_scaler = StandardScaler().fit(df[columns][: int(20 * train_ratio)])
+    np.testing.assert_allclose(scaler.mean_, expected_scaler.mean_)
+    np.testing.assert_allclose(scaler.scale_, expected_scaler.scale_)
+    if len(columns) > 1:
+        assert scaler.feature_names_in_.tolist() == columns
+    # Zero variance columns are only centered
+    np.testing.assert_allclose(
+        df_scaled[columns], expected_scaler.transform(df[columns])
+    )
+    pd.testing.assert_frame_equal(df, _create_numerical_df())
+    assert df_scaled["c"].tolist() == df["c"].tolist()
+
+
+@pytest.mark.parametrize("inplace", [True, False])
+def test_scale_fitted_scaler(inplace):
+    columns = ["x1", "x2", "x3"]
+    scaler = StandardScaler().fit(_create_numerical_df()[columns] * 2)
+    df = _create_numerical_df()
+    expected = scaler.transform(df[columns])
+    df_scaled, scaler_returned = scaling.scale(
+        df, columns, scaler=scaler, inplace=inplace
+    )
+    assert scaler_returned is scaler
+    np.testing.assert_allclose(df_scaled[columns], expected)
+    if inplace:
+        assert df_scaled is df
+    else:
+        pd.testing.assert_frame_equal(df, _create_numerical_df())
+
+
+def test_inverse_scale_sequences():
+    rng = np.random.default_rng(0)
+    scaler = StandardScaler().fit(rng.random((50, 3)) * 10)
+    sequences = rng.random((4, 6, 3))
+    expected = np.array([scaler.inverse_transform(seq) for seq in sequences])
+    np.testing.assert_allclose(
+        scaling.inverse_scale_sequences(sequences, scaler), expected
+    )
+
+
+def test_inverse_scale_sequences_single_feature():
+    rng = np.random.default_rng(0)
+    scaler = StandardScaler().fit(rng.random((50, 1)) * 10)
+    sequences = rng.random((4, 6))
+    expected = np.array(
+        [scaler.inverse_transform(seq.reshape(-1, 1)).ravel() for seq in sequences]
+    )
+    np.testing.assert_allclose(
+        scaling.inverse_scale_sequences(sequences, scaler), expected
+    )
+    np.testing.assert_allclose(
+        scaling.inverse_scale_sequences(sequences[..., np.newaxis], scaler),
+        expected[..., np.newaxis],
+    )
+
+
+def test_inverse_scale_sequences_wrong_num_features():
+    scaler = StandardScaler().fit(np.random.default_rng(0).random((50, 3)))
+    with pytest.raises(ValueError):
+        scaling.inverse_scale_sequences(np.zeros((4, 6, 2)), scaler)
+
+
+def test_compute_temporal_encoding_time_values():
+    time = pd.Series(pd.date_range("2020-01-01", periods=100, freq="7h"))
+    # The time stamps are taken from time_values instead of the time column
+    df = pd.DataFrame({"time": time[::-1].to_numpy(), "y": np.arange(100.0)})
+    encoding = preprocessing.compute_temporal_encoding(
+        df, "time", "y", "hours", time_values=time.to_numpy()
+    )
+    expected = preprocessing.compute_temporal_encoding(
+        df.assign(time=time), "time", "y", "hours"
+    )
+    assert encoding == expected
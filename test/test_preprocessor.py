@@ -0,0 +1,216 @@
+import json
+import pickle
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from tcn_sequence_models.data_processing import preprocessing
+from tcn_sequence_models.data_processing import preprocessor as preprocessor_module
+from tcn_sequence_models.data_processing.preprocessor import Preprocessor
+
+
+def _create_df(num_rows=200):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "date / time": pd.date_range("2020-01-01", periods=num_rows, freq="6h"),
+            "y": rng.random(num_rows),
+            "x": rng.random(num_rows),
+            "c": pd.Series(rng.choice(["a", "b", "c"], num_rows), dtype=object),
+        }
+    )
+    df.loc[5:8, "x"] = np.nan
+    return df
+
+
+def _process(df, model_type="tcn_tcn", autoregressive=False, **kwargs):
+    preprocessor = Preprocessor(df)
+    kwargs.setdefault("split_ratio", 0.7)
+    kwargs.setdefault("temporal_encoding_modes", ["hours", "weekdays"])
+    kwargs.setdefault("features_input_decoder", ["x"])
+    preprocessor.process(
+        features_input_encoder=["y", "x", "c"],
+        feature_target="y",
+        input_seq_len=12,
+        output_seq_len=6,
+        model_type=model_type,
+        time_col="date / time",
+        autoregressive=autoregressive,
+        **kwargs
+    )
+    return preprocessor
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_as_tf_dataset(shuffle):
+    pytest.importorskip("tensorflow")
+    preprocessor = _process(_create_df())
+    dataset = preprocessor.as_tf_dataset(batch_size=32, shuffle=shuffle)
+    batches = list(dataset.as_numpy_iterator())
+    X = [np.concatenate([b[0][i] for b in batches]) for i in range(2)]
+    y = np.concatenate([b[1] for b in batches])
+    assert batches[0][0][0].shape[0] == 32
+    assert y.shape == preprocessor.y.shape
+    if shuffle:
+        # Same sequences, different order
+        order = np.lexsort(y.T)
+        expected_order = np.lexsort(preprocessor.y.T)
+        np.testing.assert_array_equal(y[order], preprocessor.y[expected_order])
+        np.testing.assert_array_equal(X[0][order], preprocessor.X[0][expected_order])
+    else:
+        np.testing.assert_array_equal(y, preprocessor.y)
+        for x, expected in zip(X, preprocessor.X):
+            np.testing.assert_array_equal(x, expected)
+
+
+def test_as_tf_dataset_autoregressive():
+    pytest.importorskip("tensorflow")
+    preprocessor = _process(_create_df(), autoregressive=True)
+    assert len(preprocessor.X) == 4
+    batch_X, batch_y = next(preprocessor.as_tf_dataset().as_numpy_iterator())
+    # Training inputs: encoder input, decoder input and shifted target
+    assert len(batch_X) == 3
+    np.testing.assert_array_equal(batch_X[2], preprocessor.X[2][:64])
+
+
+def test_as_tf_dataset_without_target():
+    pytest.importorskip("tensorflow")
+    preprocessor = _process(_create_df())
+    X_train, _, _, _ = preprocessor.train_test_split(0.7)
+    batch = next(
+        preprocessor.as_tf_dataset(batch_size=8, X=X_train).as_numpy_iterator()
+    )
+    assert len(batch) == 2
+    np.testing.assert_array_equal(batch[0], X_train[0][:8])
+
+
+def test_split_date_time_zone():
+    df = _create_df()
+    df["date / time"] = df["date / time"].dt.tz_localize("Europe/Berlin")
+    preprocessor = _process(df, split_ratio=None, split_date="2020-01-09 23:30")
+    # The split date is compared with the local wall time, i.e. the last row before
+    # it is 2020-01-09 18:00 local time at index 35. In UTC, it would be index 36.
+    expected = _process(_create_df(), split_ratio=35 / 200)
+    np.testing.assert_array_equal(preprocessor.X[0], expected.X[0])
+
+
+@pytest.mark.parametrize("sort", [True, False])
+def test_split_date_before_data(sort):
+    df = _create_df()
+    if not sort:
+        df = df.iloc[::-1]
+    with pytest.raises(ValueError):
+        _process(df, split_ratio=None, split_date="2019-12-31")
+
+
+def _assert_X_equal(X, expected):
+    assert len(X) == len(expected)
+    for x, x_expected in zip(X, expected):
+        np.testing.assert_array_equal(x, x_expected)
+
+
+def test_save_load_preprocessor_config(tmp_path):
+    preprocessor = _process(_create_df())
+    preprocessor.save_preprocessor_config(str(tmp_path))
+    assert not list(tmp_path.glob("*.pkl"))
+
+    loaded = Preprocessor(_create_df())
+    loaded.load_preprocessor_config(str(tmp_path))
+    loaded.process_from_config_inference()
+    preprocessor.process_from_config_inference()
+    _assert_X_equal(loaded.X, preprocessor.X)
+
+
+def test_load_pickled_preprocessor_config(tmp_path):
+    preprocessor = _process(_create_df())
+    # Configuration as saved by older versions
+    config_dict = {
+        "features_input_encoder": preprocessor.features_input_encoder,
+        "features_input_decoder": preprocessor.features_input_decoder,
+        "feature_target": preprocessor.feature_target,
+        "temporal_encoding": preprocessor.temporal_encodings,
+        "autoregressive": preprocessor.autoregressive,
+        "input_seq_len": preprocessor.input_seq_len,
+        "output_seq_len": preprocessor.output_seq_len,
+        "model_type": preprocessor.model_type,
+        "time_col": preprocessor.time_col,
+    }
+    with open(tmp_path / "preprocessor_config.json", "w") as f:
+        json.dump(config_dict, f)
+    for file_name, obj in [
+        ("NaNHandler.pkl", preprocessor.nan_handler),
+        ("OneHotEncoder.pkl", preprocessor.one_hot_encoder),
+        ("scaler_X.pkl", preprocessor.scaler_X),
+        ("scaler_y.pkl", preprocessor.scaler_y),
+    ]:
+        with open(tmp_path / file_name, "wb") as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+
+    loaded = Preprocessor(_create_df())
+    loaded.load_preprocessor_config(str(tmp_path))
+    loaded.process_from_config_inference()
+    preprocessor.process_from_config_inference()
+    _assert_X_equal(loaded.X, preprocessor.X)
+
+
+@pytest.mark.parametrize("temporal_encoding_modes", [None, []])
+def test_process_without_temporal_encodings(temporal_encoding_modes):
+    preprocessor = _process(
+        _create_df(), temporal_encoding_modes=temporal_encoding_modes
+    )
+    assert preprocessor.temporal_encodings == []
+    assert preprocessor._time_ns is None
+    assert not any(
+        col.startswith("temporal_encoding") for col in preprocessor.df_processed
+    )
+    # y, x and one-hot-encoded c
+    assert preprocessor.X[0].shape[-1] == 5
+
+
+def test_process_reads_time_column_once(monkeypatch):
+    calls = []
+    wall_time_values = preprocessing.wall_time_values
+    monkeypatch.setattr(
+        preprocessing,
+        "wall_time_values",
+        lambda time_values: calls.append(1) or wall_time_values(time_values),
+    )
+    preprocessor = _process(_create_df(), temporal_encoding_modes=["hours", "months"])
+    assert len(calls) == 1
+
+    # The encodings from the configuration read the time column
+    expected = preprocessor.df_processed
+    preprocessor.process_from_config_training(12, 6)
+    pd.testing.assert_frame_equal(preprocessor.df_processed, expected)
+
+
+def test_process_array_views():
+    preprocessor = _process(_create_df())
+    for x in preprocessor.X + [preprocessor.y]:
+        assert x.dtype == np.float32
+        assert not x.flags.writeable
+
+    # Dummy decoder input if there are no decoder features
+    preprocessor = _process(
+        _create_df(), features_input_decoder=[], temporal_encoding_modes=None
+    )
+    X_decoder = preprocessor.X[1]
+    assert X_decoder.flags.writeable
+    np.testing.assert_array_equal(X_decoder, np.ones((X_decoder.shape[0], 6, 1)))
+
+
+def test_load_data_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = _create_df()
+    path = str(tmp_path / "data.parquet")
+    df.to_parquet(path)
+    preprocessor = Preprocessor(None)
+    preprocessor.load_data(path, file_type="parquet")
+    assert preprocessor.df_raw["date / time"].dtype.kind == "M"
+    pd.testing.assert_frame_equal(preprocessor.df_raw, df, check_dtype=False)
+
+
+def test_excel_engine_without_calamine(monkeypatch):
+    # A None entry in sys.modules makes the import raise an ImportError
+    monkeypatch.setitem(sys.modules, "python_calamine", None)
+    assert preprocessor_module._excel_engine() is None